@@ -1,7 +1,53 @@
 import difflib
+import filecmp
+import html
+import os
 import sys
 import xml.dom.minidom
 
+# Prefer libxml2 (lxml) for parsing/pretty-printing; minidom is the fallback
+try:
+    from lxml import etree
+    HAVE_LXML = True
+except Exception:
+    HAVE_LXML = False
+
+
+HTML_COLORS = {
+    "insert": "aaffaa",   # light green
+    "replace": "ffff77",  # yellow
+    "delete": "ffaaaa",   # light red
+    "equal": "ffffff"     # white
+}
+
+HTML_CSS = "\n".join(
+    [
+        "table { border-collapse: collapse; font-family: Consolas, monospace; font-size: 12px; }",
+        "th, td { border: 1px solid #ddd; padding: 1px 6px; white-space: pre-wrap; vertical-align: top; }",
+        "td.num { color: #888; text-align: right; }",
+    ]
+    + [f"tr.{tag} td {{ background-color: #{color}; }}" for tag, color in HTML_COLORS.items()]
+)
+
+HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+{css}
+</style>
+</head>
+<body>
+<table>
+<tr><th></th><th>{fromdesc}</th><th></th><th>{todesc}</th></tr>
+"""
+
+HTML_TAIL = """</table>
+</body>
+</html>
+"""
+
 
 def pretty_print_xml(file_path):
     """
@@ -9,10 +55,19 @@ def pretty_print_xml(file_path):
     This ensures consistent formatting for better diff results.
     """
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            xml_str = f.read()
-        dom = xml.dom.minidom.parseString(xml_str)
-        pretty_xml = dom.toprettyxml(indent="  ")
+        if HAVE_LXML:
+            if not os.path.isfile(file_path):
+                raise FileNotFoundError(file_path)
+            parser = etree.XMLParser(remove_blank_text=True, recover=True)
+            tree = etree.parse(file_path, parser)
+            if tree.getroot() is None:
+                raise ValueError("no XML root element found")
+            pretty_xml = etree.tostring(tree, pretty_print=True, encoding="unicode")
+        else:
+            with open(file_path, "r", encoding="utf-8") as f:
+                xml_str = f.read()
+            dom = xml.dom.minidom.parseString(xml_str)
+            pretty_xml = dom.toprettyxml(indent="  ")
         cleaned_lines = [line for line in pretty_xml.splitlines() if line.strip()]
         return cleaned_lines
     except FileNotFoundError:
@@ -26,17 +81,41 @@ def pretty_print_xml(file_path):
 def generate_side_by_side_diff(file1, file2, output_html):
     """
     Generates a side-by-side HTML diff between two XML files.
+    Rows are streamed straight to the output file from the diff opcodes
+    (no intra-line diffing, unlike difflib.HtmlDiff).
     """
-    xml1_lines = pretty_print_xml(file1)
-    xml2_lines = pretty_print_xml(file2)
-
-    # Create HTML diff object
-    diff = difflib.HtmlDiff(wrapcolumn=80)
-    html_content = diff.make_file(xml1_lines, xml2_lines, fromdesc=file1, todesc=file2, context=False)
+    # Fast path: byte-identical inputs need neither a second parse nor a diff
+    if os.path.isfile(file1) and os.path.isfile(file2) and filecmp.cmp(file1, file2, shallow=False):
+        print("ℹ️  Files are identical; no differences.")
+        xml1_lines = xml2_lines = pretty_print_xml(file1)
+        opcodes = [("equal", 0, len(xml1_lines), 0, len(xml2_lines))]
+    else:
+        xml1_lines = pretty_print_xml(file1)
+        xml2_lines = pretty_print_xml(file2)
+        opcodes = difflib.SequenceMatcher(None, xml1_lines, xml2_lines).get_opcodes()
 
-    # Save to file
     with open(output_html, "w", encoding="utf-8") as f:
-        f.write(html_content)
+        f.write(HTML_HEAD.format(
+            title=html.escape(f"{file1} vs {file2}"),
+            css=HTML_CSS,
+            fromdesc=html.escape(file1),
+            todesc=html.escape(file2),
+        ))
+
+        for tag, i1, i2, j1, j2 in opcodes:
+            left_block = xml1_lines[i1:i2]
+            right_block = xml2_lines[j1:j2]
+            for k in range(max(len(left_block), len(right_block))):
+                lnum = i1 + k + 1 if k < len(left_block) else ""
+                ltxt = html.escape(left_block[k]) if k < len(left_block) else ""
+                rnum = j1 + k + 1 if k < len(right_block) else ""
+                rtxt = html.escape(right_block[k]) if k < len(right_block) else ""
+                f.write(
+                    f'<tr class="{tag}"><td class="num">{lnum}</td><td>{ltxt}</td>'
+                    f'<td class="num">{rnum}</td><td>{rtxt}</td></tr>\n'
+                )
+
+        f.write(HTML_TAIL)
 
     print(f"✅ Side-by-side diff saved to: {output_html}")
     print("📂 Open this file in your browser to view the comparison.")
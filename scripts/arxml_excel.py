@@ -1,9 +1,11 @@
 
 import difflib
+import filecmp
 import sys
 import re
+from array import array
+from itertools import repeat, zip_longest
 from pathlib import Path
-import pandas as pd
 
 # primary: strict DOM
 import xml.dom.minidom
@@ -15,7 +17,9 @@ try:
 except Exception:
     HAVE_LXML = False
 
-from openpyxl.styles import PatternFill, Font
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, NamedStyle
 from openpyxl.utils import get_column_letter
 
 HTML_COLORS = {
@@ -25,6 +29,13 @@ HTML_COLORS = {
     "Equal": "ffffff"     # white
 }
 
+DIFF_COLUMNS = ["File1 Line", "File1 Text", "File2 Line", "File2 Text", "Change"]
+
+# Shared style objects (one per change type) instead of one per cell
+FILLS = {k: PatternFill(start_color=v, end_color=v, fill_type="solid") for k, v in HTML_COLORS.items()}
+FONT = Font(name="Consolas")
+HEADER_FONT = Font(bold=True)
+
 CTRL_CHARS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
 
 def load_text_safely(path: str) -> str:
@@ -75,12 +86,217 @@ def pretty_xml_lines(path: str) -> list[str]:
     print(f"🔁 Falling back to raw line diff for {path}")
     return [ln for ln in raw.splitlines() if ln.strip()]
 
+# --------------------------------------------------------------------
+# Myers O((N+M)D) diff, linear-space divide-and-conquer variant.
+# ARXML revisions are usually near-identical (D << N), where this is far
+# cheaper than difflib's Ratcliff-Obershelp matching. When the inputs differ
+# a lot, the pure-Python search turns quadratic, so it works against a step
+# budget and diff_opcodes falls back to difflib once that is spent.
+# --------------------------------------------------------------------
+
+# Step budget (diagonal steps summed over all recursion levels) before giving
+# up on Myers. It scales with the input: the search costs roughly D^2/2 steps,
+# so a ~1% change on a 100k-line ARXML needs about 10 steps per line.
+MYERS_COST_PER_LINE = 25
+MYERS_MIN_COST = 100_000
+
+def myers_budget(n: int, m: int) -> int:
+    """Step budget for diffing n lines against m lines."""
+    return max(MYERS_MIN_COST, MYERS_COST_PER_LINE * (n + m))
+
+class MyersCostExceeded(Exception):
+    """Raised when the Myers search exceeds its step budget."""
+
+def _middle_snake(a, a_lo: int, a_hi: int, b, b_lo: int, b_hi: int, budget: list) -> tuple:
+    """
+    Find the middle snake of the shortest edit script for a[a_lo:a_hi] vs
+    b[b_lo:b_hi]. Returns (x, y, u, v, d): the snake runs from (x, y) to
+    (u, v), relative to (a_lo, b_lo), and d is the edit distance.
+    A single array('i') per direction holds V, indexed with offset k + MAX.
+    budget is a one-item list of remaining steps; MyersCostExceeded is
+    raised once it runs out.
+    """
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    delta = n - m
+    odd = delta & 1
+    max_d = (n + m + 1) // 2
+    off = max_d + 1
+    vf = array("i", [0]) * (2 * max_d + 3)
+    vb = array("i", [0]) * (2 * max_d + 3)
+
+    for d in range(max_d + 1):
+        budget[0] -= 2 * (d + 1)
+        if budget[0] < 0:
+            raise MyersCostExceeded()
+
+        # forward pass
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and vf[off + k - 1] < vf[off + k + 1]):
+                x = vf[off + k + 1]
+            else:
+                x = vf[off + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            vf[off + k] = x
+            if odd and -(d - 1) <= delta - k <= d - 1 and x + vb[off + delta - k] >= n:
+                return x0, y0, x, y, 2 * d - 1
+
+        # backward pass (coordinates measured from the end of both ranges)
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and vb[off + k - 1] < vb[off + k + 1]):
+                x = vb[off + k + 1]
+            else:
+                x = vb[off + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[a_hi - 1 - x] == b[b_hi - 1 - y]:
+                x += 1
+                y += 1
+            vb[off + k] = x
+            if not odd and -d <= delta - k <= d and x + vf[off + delta - k] >= n:
+                return n - x, m - y, n - x0, m - y0, 2 * d
+
+    raise RuntimeError("Myers diff failed to find a middle snake")
+
+
+def _myers_matches(a, a_lo: int, a_hi: int, b, b_lo: int, b_hi: int, out: list, budget: list) -> None:
+    """Append (i, j, size) matching blocks for a[a_lo:a_hi] vs b[b_lo:b_hi] to out, in order."""
+    # Strip the common prefix/suffix; this also guarantees d >= 2 below.
+    head = 0
+    while a_lo + head < a_hi and b_lo + head < b_hi and a[a_lo + head] == b[b_lo + head]:
+        head += 1
+    if head:
+        out.append((a_lo, b_lo, head))
+        a_lo += head
+        b_lo += head
+
+    tail = 0
+    while a_lo < a_hi - tail and b_lo < b_hi - tail and a[a_hi - 1 - tail] == b[b_hi - 1 - tail]:
+        tail += 1
+    a_hi -= tail
+    b_hi -= tail
+
+    if a_lo < a_hi and b_lo < b_hi:
+        x, y, u, v, _ = _middle_snake(a, a_lo, a_hi, b, b_lo, b_hi, budget)
+        _myers_matches(a, a_lo, a_lo + x, b, b_lo, b_lo + y, out, budget)
+        if u > x:
+            out.append((a_lo + x, b_lo + y, u - x))
+        _myers_matches(a, a_lo + u, a_hi, b, b_lo + v, b_hi, out, budget)
+
+    if tail:
+        out.append((a_hi, b_hi, tail))
+
+
+def myers_opcodes(a: list[str], b: list[str], max_cost: int | None = None) -> list[tuple]:
+    """
+    Myers diff of two line lists, returned in the same
+    (tag, i1, i2, j1, j2) shape as difflib.SequenceMatcher.get_opcodes().
+    Raises MyersCostExceeded if the search needs more than max_cost steps
+    (default: myers_budget(len(a), len(b))).
+    """
+    # Compare small ints instead of (potentially long) line strings
+    ids: dict[str, int] = {}
+    a_ids = [ids.setdefault(ln, len(ids)) for ln in a]
+    b_ids = [ids.setdefault(ln, len(ids)) for ln in b]
+
+    blocks: list[tuple] = []
+    if max_cost is None:
+        max_cost = myers_budget(len(a), len(b))
+    _myers_matches(a_ids, 0, len(a_ids), b_ids, 0, len(b_ids), blocks, [max_cost])
+
+    # Merge adjacent blocks, then convert to opcodes like difflib does
+    merged: list[tuple] = []
+    for i, j, size in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            pi, pj, psize = merged[-1]
+            merged[-1] = (pi, pj, psize + size)
+        else:
+            merged.append((i, j, size))
+    merged.append((len(a), len(b), 0))
+
+    opcodes = []
+    i = j = 0
+    for ai, bj, size in merged:
+        if i < ai and j < bj:
+            opcodes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, ai, j, bj))
+        if size:
+            opcodes.append(("equal", ai, ai + size, bj, bj + size))
+        i, j = ai + size, bj + size
+    return opcodes
+
+
+DIFF_ALGORITHMS = ("myers", "difflib")
+
+def common_prefix_len(a: list[str], b: list[str]) -> int:
+    n = min(len(a), len(b))
+    p = 0
+    while p < n and a[p] == b[p]:
+        p += 1
+    return p
+
+def common_suffix_len(a: list[str], b: list[str], start: int = 0) -> int:
+    """Length of the common tail of a[start:] and b[start:] (without slicing)."""
+    n = min(len(a), len(b)) - start
+    s = 0
+    while s < n and a[-1 - s] == b[-1 - s]:
+        s += 1
+    return s
+
+def diff_opcodes(a: list[str], b: list[str], algorithm: str = "myers") -> list[tuple]:
+    """
+    Return difflib-style opcodes using Myers (default) or difflib.
+    Myers switches to difflib automatically when the inputs differ too much.
+    The shared header/footer lines are trimmed first and only the middle is diffed.
+    """
+    if algorithm not in DIFF_ALGORITHMS:
+        raise ValueError(f"Unknown diff algorithm: {algorithm}")
+
+    p = common_prefix_len(a, b)
+    s = common_suffix_len(a, b, p)
+    a_mid = a[p:len(a) - s]
+    b_mid = b[p:len(b) - s]
+
+    mid_ops = None
+    if algorithm == "myers":
+        try:
+            mid_ops = myers_opcodes(a_mid, b_mid)
+        except MyersCostExceeded:
+            print("ℹ️  Inputs differ too much for Myers; falling back to difflib.")
+    if mid_ops is None:
+        mid_ops = difflib.SequenceMatcher(None, a_mid, b_mid).get_opcodes()
+
+    opcodes = []
+    if p:
+        opcodes.append(("equal", 0, p, 0, p))
+    for tag, i1, i2, j1, j2 in mid_ops:
+        opcodes.append((tag, i1 + p, i2 + p, j1 + p, j2 + p))
+    if s:
+        opcodes.append(("equal", len(a) - s, len(a), len(b) - s, len(b)))
+    return opcodes
+
+CHANGE_TYPES = {"insert": "Added", "delete": "Deleted", "replace": "Changed"}
+
 def classify(tag: str) -> str:
-    return {"insert": "Added", "delete": "Deleted", "replace": "Changed"}.get(tag, "Equal")
+    return CHANGE_TYPES.get(tag, "Equal")
 
-def generate_excel_diff(file1: str, file2: str, out_xlsx: str) -> None:
-    xml1 = pretty_xml_lines(file1)
-    xml2 = pretty_xml_lines(file2)
+def generate_excel_diff(file1: str, file2: str, out_xlsx: str, algorithm: str = "myers") -> None:
+    # Fast path: byte-identical inputs need neither a second parse nor a diff
+    if filecmp.cmp(file1, file2, shallow=False):
+        print(f"ℹ️  {file1} and {file2} are identical; no differences.")
+        xml1 = xml2 = pretty_xml_lines(file1)
+        opcodes = [("equal", 0, len(xml1), 0, len(xml2))]
+    else:
+        xml1 = pretty_xml_lines(file1)
+        xml2 = pretty_xml_lines(file2)
+        opcodes = diff_opcodes(xml1, xml2, algorithm)
 
     # Quick diagnostics if something looks off
     if not xml1:
@@ -88,52 +304,61 @@ def generate_excel_diff(file1: str, file2: str, out_xlsx: str) -> None:
     if not xml2:
         print(f"⚠️  Warning: {file2} produced 0 lines after preprocessing.")
 
-    matcher = difflib.SequenceMatcher(None, xml1, xml2)
     rows = []
 
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-        left_block  = xml1[i1:i2]
-        right_block = xml2[j1:j2]
-        max_len = max(len(left_block), len(right_block))
-        change_type = classify(tag)
-
-        for k in range(max_len):
-            lnum = i1 + k + 1 if k < len(left_block)  else ""
-            ltxt = left_block[k]  if k < len(left_block)  else ""
-            rnum = j1 + k + 1 if k < len(right_block) else ""
-            rtxt = right_block[k] if k < len(right_block) else ""
-            rows.append([lnum, ltxt, rnum, rtxt, change_type])
-
-    df = pd.DataFrame(rows, columns=["File1 Line", "File1 Text", "File2 Line", "File2 Text", "Change"])
+    # Emit each opcode block in one go; the shorter side is padded with ""
+    for tag, i1, i2, j1, j2 in opcodes:
+        max_len = max(i2 - i1, j2 - j1)
+        rows.extend(zip_longest(
+            range(i1 + 1, i2 + 1), xml1[i1:i2],
+            range(j1 + 1, j2 + 1), xml2[j1:j2],
+            repeat(classify(tag), max_len),
+            fillvalue="",
+        ))
 
     out = Path(out_xlsx)
     out.parent.mkdir(parents=True, exist_ok=True)
 
-    with pd.ExcelWriter(out, engine="openpyxl") as writer:
-        df.to_excel(writer, sheet_name="Diff", index=False)
-        ws = writer.book["Diff"]
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Diff")
+
+    # One named style (fill + font) per change type: each cell gets a single
+    # style reference instead of hashing a fill and a font on every assignment
+    for change, fill in FILLS.items():
+        wb.add_named_style(NamedStyle(name=f"Diff {change}", fill=fill, font=FONT))
+
+    # Column widths must be set before any row is appended in write-only mode
+    for col in range(1, 6):
+        ws.column_dimensions[get_column_letter(col)].width = 70
+
+    header = []
+    for name in DIFF_COLUMNS:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font = HEADER_FONT
+        header.append(cell)
+    ws.append(header)
 
-        # HTML-like colors + monospace font
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-            change = row[4].value
-            color = HTML_COLORS.get(change, "ffffff")
-            fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
-            for cell in row:
-                cell.fill = fill
-                cell.font = Font(name="Consolas")
+    # HTML-like colors + monospace font
+    for record in rows:
+        style = f"Diff {record[4]}" if record[4] in FILLS else "Diff Equal"
+        cells = []
+        for value in record:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            cells.append(cell)
+        ws.append(cells)
 
-        # Column widths
-        for col in range(1, 6):
-            ws.column_dimensions[get_column_letter(col)].width = 70
+    wb.save(out)
 
     print(f"✅ Excel diff saved → {out_xlsx}")
 
 def main():
-    if len(sys.argv) != 4:
-        print("Usage: python scripts/arxml_excel.py <file1.xml> <file2.xml> <output.xlsx>")
+    if len(sys.argv) not in (4, 5) or (len(sys.argv) == 5 and sys.argv[4] not in DIFF_ALGORITHMS):
+        print("Usage: python scripts/arxml_excel.py <file1.xml> <file2.xml> <output.xlsx> [myers|difflib]")
         sys.exit(1)
     f1, f2, out = sys.argv[1], sys.argv[2], sys.argv[3]
-    generate_excel_diff(f1, f2, out)
+    algorithm = sys.argv[4] if len(sys.argv) == 5 else "myers"
+    generate_excel_diff(f1, f2, out, algorithm)
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,8 @@
 import os
 import json
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from lxml import etree
+from openpyxl import Workbook
 import re
 
 # ============== CONFIG ==================
@@ -11,13 +12,35 @@ RULE_FILE = os.path.join(BASE_DIR, "..", "rules", "rules.json")
 OUTPUT_FILE = os.path.join(BASE_DIR, "output", "report.xlsx")
 # ========================================
 
+# Rules of the form //TAG, evaluable during iterparse
+STREAMABLE_RE = re.compile(r"^//([A-Za-z_][\w.\-]*)$")
+
+# One parser shared by all files; ARXML doesn't use xml:id, so skip the ID table
+PARSER = etree.XMLParser(remove_blank_text=True, huge_tree=True, collect_ids=False)
+
 
 def load_rules():
     with open(RULE_FILE, "r", encoding="utf-8") as f:
-        return json.load(f).get("rules", [])
+        rules = json.load(f).get("rules", [])
+
+    # Precompute per-rule matchers so checks don't re-parse "expected"
+    for rule in rules:
+        condition = rule.get("condition", "")
+        expected = rule.get("expected", "")
+        if condition == "REGEX":
+            rule["_re"] = re.compile(expected)
+        elif condition == "IN":
+            rule["_in_set"] = frozenset(x.strip() for x in expected.split(","))
 
+        # "//TAG" rules only need element text, so they can be checked while streaming
+        match = STREAMABLE_RE.match(rule.get("xpath", ""))
+        rule["_stream_tag"] = match.group(1) if match and not rule.get("variables") else None
+    return rules
 
-def evaluate_condition(actual, expected, condition):
+
+def evaluate_condition(actual, rule):
+    condition = rule.get("condition", "")
+    expected = rule.get("expected", "")
     if condition == "EQUALS":
         return actual == expected
     if condition == "NOT_EQUALS":
@@ -25,87 +48,272 @@ def evaluate_condition(actual, expected, condition):
     if condition == "EXISTS":
         return actual not in (None, "")
     if condition == "IN":
-        return actual in [x.strip() for x in expected.split(",")]
+        return actual in rule["_in_set"]
     if condition == "REGEX":
-        return re.match(expected, actual or "") is not None
+        return rule["_re"].match(actual or "") is not None
     return False
 
 
+# XPath lexer: literals, variables, numbers, (Q)names, multi-char and single-char tokens
+XPATH_TOKEN_RE = re.compile(r"""
+    (?P<literal>"[^"]*"|'[^']*')
+  | (?P<variable>\$[A-Za-z_][\w.\-]*(?::[A-Za-z_][\w.\-]*)?)
+  | (?P<number>\d+(?:\.\d*)?|\.\d+)
+  | (?P<name>[A-Za-z_][\w.\-]*(?::[A-Za-z_][\w.\-]*)?)
+  | (?P<space>\s+)
+  | (?P<op>::|//|\.\.|!=|<=|>=|.)
+""", re.VERBOSE)
+XPATH_OPERATOR_NAMES = {"and", "or", "div", "mod"}
+
+
+def rewrite_name_tests(xpath, replace):
+    """
+    Rewrite every unprefixed element name test in `xpath` with replace(name),
+    leaving functions, axes, attributes, variables, literals and operator
+    names alone (also inside predicates).
+    """
+    tokens = [(m.lastgroup, m.group()) for m in XPATH_TOKEN_RE.finditer(xpath)]
+    significant = [i for i, (kind, _) in enumerate(tokens) if kind != "space"]
+    out = [text for _, text in tokens]
+
+    for pos, i in enumerate(significant):
+        kind, text = tokens[i]
+        if kind != "name" or ":" in text:
+            continue
+        prev = tokens[significant[pos - 1]] if pos > 0 else None
+        nxt = tokens[significant[pos + 1]] if pos + 1 < len(significant) else None
+        if nxt is not None and nxt[1] in ("(", "::"):
+            continue  # function, node type or axis name
+        if prev is not None and prev[1] == "@":
+            continue  # attribute
+        if prev is not None and prev[1] == "::" and tokens[significant[pos - 2]][1] == "attribute":
+            continue  # attribute::name
+        if (text in XPATH_OPERATOR_NAMES and prev is not None
+                and (prev[0] in ("name", "literal", "number", "variable") or prev[1] in (")", "]", "*", ".", ".."))):
+            continue  # and / or / div / mod used as an operator
+        out[i] = replace(text)
+    return "".join(out)
+
+
 def normalize_xpath(xpath):
     """
-    Force namespace-safe XPath
+    Force namespace-safe XPath: //A/B[C=$v] -> //*[local-name()='A']/*[local-name()='B'][*[local-name()='C']=$v]
     """
     if "local-name()" in xpath:
         return xpath
-    return xpath.replace("//", "//*[local-name()='") \
-                .replace("/", "'][local-name()='") + "']"
+    return rewrite_name_tests(xpath, lambda name: f"*[local-name()='{name}']")
 
 
-# ============== MAIN ==================
-results = []
-rules = load_rules()
+# Rule namespace for documents without a default namespace that still declare
+# prefixed ones: element names are then matched by local-name()
+ANY_NAMESPACE = object()
+
+# Plain element paths like //A/B/C can use namespaced tag matching
+SIMPLE_PATH_RE = re.compile(r"^(/{1,2}[A-Za-z_][\w.\-]*)+$")
+PATH_STEP_RE = re.compile(r"(/+)([A-Za-z_][\w.\-]*)")
+
+
+def namespace_xpath(xpath, prefix="ar"):
+    """
+    Rewrite //A/B into //ar:A/ar:B
+    """
+    return PATH_STEP_RE.sub(rf"\1{prefix}:\2", xpath)
 
-print(f"Loaded rules: {len(rules)}")
 
-if not rules:
-    raise SystemExit("ERROR: No rules loaded")
+def rule_namespace(root):
+    """
+    Namespace that rule paths are bound to for a document: the root's default
+    namespace, or ANY_NAMESPACE when the root only declares prefixed
+    namespaces (e.g. <ar:AUTOSAR xmlns:ar="...">).
+    """
+    namespace = root.nsmap.get(None)
+    if namespace is None and root.nsmap:
+        return ANY_NAMESPACE
+    return namespace
+
+
+def compile_rules(rules, namespace=None):
+    """
+    Compile every rule's XPath once, up front, for documents whose rule
+    namespace (see rule_namespace) is `namespace`.
+    Plain element paths are bound to the namespace via the "ar" prefix;
+    anything else, and every path under ANY_NAMESPACE, falls back to the
+    legacy local-name() rewrite.
+    Rules with the same XPath share one compiled expression; literals can be
+    passed as XPath variables (e.g. "$prop") via the rule's "variables" dict.
+    Returns a list of (rule, xpath, compiled_expr_or_None).
+    """
+    nsmap = {"ar": namespace} if namespace and namespace is not ANY_NAMESPACE else None
+    cache = {}
+    compiled = []
+    for rule in rules:
+        raw = rule.get("xpath", "")
+        if namespace is not ANY_NAMESPACE and SIMPLE_PATH_RE.match(raw):
+            xpath = namespace_xpath(raw) if namespace else raw
+        else:
+            xpath = normalize_xpath(raw)
+        if xpath not in cache:
+            try:
+                cache[xpath] = etree.XPath(xpath, namespaces=nsmap)
+            except etree.XPathSyntaxError as e:
+                print(f"WARNING: Invalid XPath in rule {rule.get('rule_id', 'UNKNOWN')}: {xpath} ({e})")
+                cache[xpath] = None
+        compiled.append((rule, xpath, cache[xpath]))
+    return compiled
+
+
+# ============== WORKER ==================
+# Per-process state, set up once by init_worker
+_rules = []
+_compiled_by_ns = {}  # compiled rule sets, keyed by rule namespace
 
-for root_dir, _, files in os.walk(ARXML_DIR):
-    for file in files:
-        if not file.lower().endswith(".arxml"):
+
+def init_worker(rules):
+    """
+    Store the rules once per worker process.
+    Compiled XPath objects can't be pickled, so each worker compiles its own.
+    """
+    global _rules, _compiled_by_ns
+    _rules = rules
+    _compiled_by_ns = {}
+
+
+def stream_values(full_path, tags):
+    """
+    Single streaming pass with iterparse: collect the stripped text of every
+    element whose tag is in `tags`, in document order (like //TAG), clearing
+    elements as we go so memory stays flat.
+    Returns (rule namespace, {tag: [texts]}).
+    """
+    values = {tag: [] for tag in tags}
+    pending = []  # (values list, slot index) of matched elements still open
+    namespace = None
+    wanted = None
+    context = etree.iterparse(full_path, events=("start", "end"), remove_blank_text=True,
+                              huge_tree=True, collect_ids=False)
+    for event, elem in context:
+        if wanted is None:
+            # Bind tags the same way compile_rules binds rule paths
+            namespace = rule_namespace(elem)
+            if namespace is ANY_NAMESPACE or not namespace:
+                wanted = {tag: tag for tag in tags}
+            else:
+                wanted = {f"{{{namespace}}}{tag}": tag for tag in tags}
+        if namespace is ANY_NAMESPACE:
+            tag = wanted.get(elem.tag.rpartition("}")[2])
+        else:
+            tag = wanted.get(elem.tag)
+
+        if event == "start":
+            # Reserve the slot now so nested matches keep document order;
+            # the text is only complete at the "end" event
+            if tag is not None:
+                values[tag].append("")
+                pending.append((values[tag], len(values[tag]) - 1))
             continue
 
-        full_path = os.path.join(root_dir, file)
-        rel_path = os.path.relpath(full_path, ARXML_DIR)
+        if tag is not None:
+            slots, index = pending.pop()
+            slots[index] = (elem.text or "").strip()
+        elem.clear(keep_tail=True)
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    return namespace, values
+
 
-        print(f"Processing: {rel_path}")
+def evaluate_rules(rel_path, file, compiled, find_values):
+    """
+    Apply compiled rules to one file; find_values(rule, expr) returns the
+    actual text values the rule's XPath selects.
+    """
+    rows = []
+    for rule, xpath, expr in compiled:
+        rule_id = rule.get("rule_id", "UNKNOWN")
+        desc = rule.get("description", "")
+        expected = rule.get("expected", "")
+        mandatory = rule.get("mandatory", True)
+
+        if expr is None:
+            rows.append([
+                rel_path, file, rule_id, desc,
+                xpath, expected, "", "INVALID_XPATH"
+            ])
+            continue
 
         try:
-            tree = etree.parse(full_path)
-            root = tree.getroot()
-        except Exception as e:
-            results.append([
-                rel_path, file, "PARSE_ERROR",
-                "", "", str(e), "FAIL"
+            values = find_values(rule, expr)
+        except Exception:
+            rows.append([
+                rel_path, file, rule_id, desc,
+                xpath, expected, "", "INVALID_XPATH"
             ])
             continue
 
-        for rule in rules:
-            rule_id = rule.get("rule_id", "UNKNOWN")
-            desc = rule.get("description", "")
-            xpath = normalize_xpath(rule.get("xpath", ""))
-            condition = rule.get("condition", "")
-            expected = rule.get("expected", "")
-            mandatory = rule.get("mandatory", True)
+        if not values:
+            status = "FAIL" if mandatory else "SKIP"
+            rows.append([
+                rel_path, file, rule_id, desc,
+                xpath, expected, "", status
+            ])
+            continue
+
+        for actual in values:
+            status = "PASS" if evaluate_condition(actual, rule) else "FAIL"
+
+            rows.append([
+                rel_path, file, rule_id, desc,
+                xpath, expected, actual, status
+            ])
+
+    return rows
+
+
+def process_file(full_path):
+    """
+    Validate a single ARXML file against all rules; returns its result rows.
+    If every rule is a plain //TAG text check the file is streamed with
+    iterparse; otherwise it is parsed once and all rules run as XPath.
+    """
+    file = os.path.basename(full_path)
+    rel_path = os.path.relpath(full_path, ARXML_DIR)
+
+    print(f"Processing: {rel_path}", flush=True)
+
+    try:
+        if all(rule["_stream_tag"] for rule in _rules):
+            namespace, values = stream_values(full_path, {rule["_stream_tag"] for rule in _rules})
+
+            def find_values(rule, expr):
+                return values[rule["_stream_tag"]]
+        else:
+            root = etree.parse(full_path, PARSER).getroot()
+            namespace = rule_namespace(root)
+
+            def find_values(rule, expr):
+                return [(elem.text or "").strip() for elem in expr(root, **rule.get("variables", {}))]
+    except Exception as e:
+        return [[
+            rel_path, file, "PARSE_ERROR",
+            "", "", str(e), "FAIL"
+        ]]
+
+    if namespace not in _compiled_by_ns:
+        _compiled_by_ns[namespace] = compile_rules(_rules, namespace)
+
+    return evaluate_rules(rel_path, file, _compiled_by_ns[namespace], find_values)
+
+
+def collect_arxml_files():
+    paths = []
+    for root_dir, _, files in os.walk(ARXML_DIR):
+        for file in files:
+            if file.lower().endswith(".arxml"):
+                paths.append(os.path.join(root_dir, file))
+    return paths
 
-            try:
-                elements = root.xpath(xpath)
-            except Exception:
-                results.append([
-                    rel_path, file, rule_id, desc,
-                    xpath, expected, "", "INVALID_XPATH"
-                ])
-                continue
-
-            if not elements:
-                status = "FAIL" if mandatory else "SKIP"
-                results.append([
-                    rel_path, file, rule_id, desc,
-                    xpath, expected, "", status
-                ])
-                continue
-
-            for elem in elements:
-                actual = (elem.text or "").strip()
-                status = "PASS" if evaluate_condition(actual, expected, condition) else "FAIL"
-
-                results.append([
-                    rel_path, file, rule_id, desc,
-                    xpath, expected, actual, status
-                ])
 
 # ============== REPORT ==================
-df = pd.DataFrame(results, columns=[
+COLUMNS = [
     "ARXML Path",
     "ARXML File",
     "Rule ID",
@@ -114,9 +322,44 @@ df = pd.DataFrame(results, columns=[
     "Expected",
     "Actual",
     "Status"
-])
+]
+
+
+def write_report(results):
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+
+    # Write-only workbook streams rows straight to disk (no per-cell styles)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Report")
+    ws.append(COLUMNS)
+    for row in results:
+        ws.append(row)
+    wb.save(OUTPUT_FILE)
+
+    print(f"Validation completed. Report generated: {OUTPUT_FILE}")
+
+
+# ============== MAIN ==================
+def main():
+    results = []
+    rules = load_rules()
+
+    print(f"Loaded rules: {len(rules)}")
+
+    if not rules:
+        raise SystemExit("ERROR: No rules loaded")
+
+    paths = collect_arxml_files()
+
+    # Files are independent; validate them in parallel, keeping walk order
+    with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                             initializer=init_worker,
+                             initargs=(rules,)) as executor:
+        for rows in executor.map(process_file, paths):
+            results.extend(rows)
+
+    write_report(results)
 
-os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-df.to_excel(OUTPUT_FILE, index=False)
 
-print(f"Validation completed. Report generated: {OUTPUT_FILE}")
+if __name__ == "__main__":
+    main()
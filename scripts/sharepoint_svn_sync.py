@@ -1,10 +1,17 @@
 import os
+import json
+import hashlib
+import mmap
 import pathlib
 import time
 import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import msal
 import requests
-from typing import Dict, Any, Optional, List
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional, List, Tuple
 
 # --------------------------------------------------------------------
 SP_HOSTNAME  = "lnttsgroup.sharepoint.com"
@@ -27,9 +34,37 @@ START_PATH    = "CICD_Automation"
 # Local download root
 DOWNLOAD_ROOT = pathlib.Path("sharepoint_sync")
 
+# Sync state lives outside DOWNLOAD_ROOT so it is never copied into SVN or
+# committed with the downloaded files. Point SHAREPOINT_SYNC_STATE_DIR at a
+# cached directory to keep it between CI runs.
+STATE_DIR = pathlib.Path(os.environ.get("SHAREPOINT_SYNC_STATE_DIR")
+                         or pathlib.Path(__file__).resolve().parent / ".sharepoint_sync_state")
+
+# Delta link + folder-id map from the previous run (enables incremental sync)
+DELTA_STATE_FILE = STATE_DIR / "delta_state.json"
+
+# Sidecar of item id -> {eTag, sha256} for files already downloaded
+ETAGS_FILE = STATE_DIR / "etags.json"
+
+# Only fetch the DriveItem fields we actually use
+ITEM_SELECT  = "id,name,file,folder,size,eTag"
+DELTA_SELECT = f"{ITEM_SELECT},parentReference,deleted"
+
 # Streaming chunk size (bytes)
 CHUNK_SIZE = 4 * 1024 * 1024  # 4 MB
 
+# Concurrent downloads (kept low to stay clear of Graph throttling)
+MAX_WORKERS = 8
+
+# Shared back-off deadline (time.monotonic()) set when Graph throttles us
+_throttle_lock = threading.Lock()
+_throttle_until = 0.0
+
+# One Session for all Graph calls: keeps TCP/TLS connections warm.
+# Pool is sized above MAX_WORKERS; retries are handled by request_with_retry.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0))
+
 def log(msg: str) -> None:
     print(msg, flush=True)
 
@@ -61,9 +96,14 @@ def request_with_retry(method: str,
     Generic HTTP request with exponential backoff for throttling/transient errors.
     Respects Retry-After when provided.
     """
-    session = requests.Session()
+    global _throttle_until
     for attempt in range(max_retries):
-        resp = session.request(method, url, headers=headers, params=params,
+        # Honour a back-off requested by any other download thread
+        with _throttle_lock:
+            wait = _throttle_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        resp = SESSION.request(method, url, headers=headers, params=params,
                                stream=stream, timeout=timeout)
         if resp.status_code in (429, 503, 504):
             retry_after = resp.headers.get("Retry-After")
@@ -72,6 +112,9 @@ def request_with_retry(method: str,
             else:
                 delay = min(60, 2 ** attempt)  # exponential fallback
             log(f"[Retry] {resp.status_code} on {url} — waiting {delay}s (attempt {attempt+1}/{max_retries})")
+            # Back off pool-wide so the other threads stop hammering Graph too
+            with _throttle_lock:
+                _throttle_until = max(_throttle_until, time.monotonic() + delay)
             time.sleep(delay)
             continue
         resp.raise_for_status()
@@ -84,8 +127,12 @@ def graph_get(url: str, token: str, params: Optional[Dict[str, str]] = None) ->
     resp = request_with_retry("GET", url, headers={"Authorization": f"Bearer {token}"}, params=params)
     return resp.json()
 
-def graph_stream_to_file(url: str, token: str, dest_path: pathlib.Path) -> None:
-    """Stream file content to disk (handles large files safely)."""
+def graph_stream_to_file(url: str, token: str, dest_path: pathlib.Path) -> str:
+    """
+    Stream file content to disk (handles large files safely).
+    Returns the SHA-256 hex digest of the written content.
+    """
+    digest = hashlib.sha256()
     dest_path.parent.mkdir(parents=True, exist_ok=True)
     with request_with_retry("GET", url, headers={"Authorization": f"Bearer {token}"}, stream=True) as resp:
         total = resp.headers.get("Content-Length")
@@ -95,10 +142,12 @@ def graph_stream_to_file(url: str, token: str, dest_path: pathlib.Path) -> None:
             for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
                 if chunk:
                     f.write(chunk)
+                    digest.update(chunk)
                     downloaded += len(chunk)
                     if total_int and downloaded % (10 * 1024 * 1024) < CHUNK_SIZE:
                         pct = (downloaded / total_int) * 100
                         log(f"    [Progress] {dest_path.name}: {pct:.1f}% ({downloaded}/{total_int} bytes)")
+    return digest.hexdigest()
 
 def get_site_id(token: str) -> str:
     """
@@ -149,7 +198,7 @@ def list_children(token: str, drive_id: str, rel_path: Optional[str] = None) ->
 
     items: List[Dict[str, Any]] = []
     next_url: str = url
-    params: Optional[Dict[str, str]] = {"$top": "200"}
+    params: Optional[Dict[str, str]] = {"$top": "200", "$select": ITEM_SELECT}
     while True:
         data = graph_get(next_url, token, params=params)
         items.extend(data.get("value", []))
@@ -160,30 +209,206 @@ def list_children(token: str, drive_id: str, rel_path: Optional[str] = None) ->
         time.sleep(0.05)
     return items
 
-def download_item(token: str, drive_id: str, item: Dict[str, Any], base_path: pathlib.Path) -> None:
-    """Download a single file item to base_path (streaming)."""
+def delta_children(token: str,
+                   drive_id: str,
+                   token_state: Optional[str] = None) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Fetch drive changes via /drives/{drive-id}/root/delta.
+    - token_state None: ask for token=latest (no items, just a starting point)
+    - token_state set:  follow the saved @odata.deltaLink and return changed items
+    Returns (items, new_delta_link). Raises requests.HTTPError (410) when the
+    saved link has expired and a full resync is needed.
+    """
+    if token_state:
+        next_url, params = token_state, None
+    else:
+        next_url = f"{GRAPH_BASE}/drives/{drive_id}/root/delta"
+        params = {"token": "latest", "$select": DELTA_SELECT}
+
+    items: List[Dict[str, Any]] = []
+    while True:
+        data = graph_get(next_url, token, params=params)
+        items.extend(data.get("value", []))
+        delta_link = data.get("@odata.deltaLink")
+        if delta_link:
+            return items, delta_link
+        next_url, params = data["@odata.nextLink"], None
+        time.sleep(0.05)
+
+def load_delta_state(state_file: pathlib.Path) -> Dict[str, Any]:
+    try:
+        return json.loads(state_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def save_delta_state(state_file: pathlib.Path, state: Dict[str, Any]) -> None:
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    state_file.write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+def load_etags(etags_file: pathlib.Path) -> Dict[str, Dict[str, str]]:
+    try:
+        return json.loads(etags_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def save_etags(etags_file: pathlib.Path, etags: Dict[str, Dict[str, str]]) -> None:
+    etags_file.parent.mkdir(parents=True, exist_ok=True)
+    etags_file.write_text(json.dumps(etags, indent=2, sort_keys=True), encoding="utf-8")
+
+def resolve_delta_files(items: List[Dict[str, Any]],
+                        folders: Dict[str, str],
+                        base_path: pathlib.Path) -> Optional[List[Tuple[Dict[str, Any], pathlib.Path]]]:
+    """
+    Map delta items onto local folders using the saved folder-id -> local path map
+    (delta responses don't carry parentReference.path). Items outside the synced
+    tree are ignored. Returns None if a folder shows up under a new path (renamed,
+    moved, moved in, or newly created), since delta doesn't report the
+    descendants of moved folders and they need a full walk. An item can show up
+    more than once in a delta; only its last occurrence counts.
+    """
+    latest = {it["id"]: it for it in items}
+    files: List[Tuple[Dict[str, Any], pathlib.Path]] = []
+    for it in latest.values():
+        if it.get("deleted"):
+            folders.pop(it["id"], None)
+            continue
+        parent_id = (it.get("parentReference") or {}).get("id")
+        if parent_id not in folders:
+            continue
+        local_rel = pathlib.PurePosixPath(folders[parent_id], clean_name(it["name"])).as_posix()
+        if it.get("folder"):
+            # Renamed/moved folders (and folders moved in from elsewhere in the
+            # drive) don't get their descendants reported; only a walk finds them
+            if folders.get(it["id"]) != local_rel:
+                return None
+        elif it.get("file"):
+            files.append((it, base_path / folders[parent_id]))
+    return files
+
+def fast_sha256(path: pathlib.Path) -> str:
+    """SHA-256 hex digest of a file (hashlib.file_digest on 3.11+, mmap otherwise)."""
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        return h.hexdigest()
+
+def is_unchanged(item: Dict[str, Any], dest: pathlib.Path, etags: Optional[Dict[str, Dict[str, str]]]) -> bool:
+    """
+    True if dest already holds this item: same size, the same eTag as recorded
+    when the item was last downloaded, and the local content still matches the
+    SHA-256 recorded at that download. Without a record the file is downloaded
+    once, so a same-size edit can't slip through as "unchanged".
+    """
+    record = etags.get(item["id"]) if etags is not None else None
+    if not isinstance(record, dict):
+        return False
+    if not dest.is_file() or dest.stat().st_size != item.get("size"):
+        return False
+    if record.get("eTag") != item.get("eTag"):
+        return False
+    return record.get("sha256") == fast_sha256(dest)
+
+def download_item(token: str,
+                  drive_id: str,
+                  item: Dict[str, Any],
+                  base_path: pathlib.Path,
+                  etags: Optional[Dict[str, Dict[str, str]]] = None) -> None:
+    """
+    Download a single file item to base_path (streaming).
+    Skipped when the local copy is unchanged; etags (item id -> {eTag, sha256})
+    is updated only after an actual download.
+    """
     name = clean_name(item["name"])
     dest = base_path / name
+    if is_unchanged(item, dest, etags):
+        log(f"[Skip] {item['name']} (unchanged)")
+        return
     url = f"{GRAPH_BASE}/drives/{drive_id}/items/{item['id']}/content"
     log(f"[DL] {item['name']} -> {dest}")
-    graph_stream_to_file(url, token, dest)
+    sha256 = graph_stream_to_file(url, token, dest)
+    if etags is not None and item.get("eTag"):
+        etags[item["id"]] = {"eTag": item["eTag"], "sha256": sha256}
+
+def collect_files(token: str,
+                  drive_id: str,
+                  folder_path: str = "",
+                  base_path: pathlib.Path = DOWNLOAD_ROOT,
+                  folders: Optional[Dict[str, str]] = None) -> List[Tuple[Dict[str, Any], pathlib.Path]]:
+    """
+    Walk the folder tree breadth-first; return (file item, local folder) pairs.
+    If `folders` is given, record each folder's id -> local path (relative to base_path).
+    """
+    files: List[Tuple[Dict[str, Any], pathlib.Path]] = []
+    queue = deque([(folder_path, base_path)])
+    while queue:
+        rel, base = queue.popleft()
+        for it in list_children(token, drive_id, rel_path=rel or None):
+            if it.get("folder"):
+                new_rel = f"{rel}/{it['name']}" if rel else it["name"]
+                new_base = base / clean_name(it["name"])
+                log(f"[Dir] {new_rel}")
+                if folders is not None:
+                    folders[it["id"]] = new_base.relative_to(base_path).as_posix()
+                queue.append((new_rel, new_base))
+            elif it.get("file"):
+                files.append((it, base))
+            # ignore other facets
+    return files
 
 def walk_and_download(token: str,
                       drive_id: str,
                       folder_path: str = "",
-                      base_path: pathlib.Path = DOWNLOAD_ROOT) -> None:
-    """Recursively traverse folders and download files, preserving structure."""
-    children = list_children(token, drive_id, rel_path=folder_path or None)
-    for it in children:
-        if it.get("folder"):
-            sub_name = clean_name(it["name"])
-            new_rel = f"{folder_path}/{it['name']}" if folder_path else it["name"]
-            new_base = base_path / sub_name
-            log(f"[Dir] {new_rel}")
-            walk_and_download(token, drive_id, new_rel, new_base)
-        elif it.get("file"):
-            download_item(token, drive_id, it, base_path)
-        # ignore other facets
+                      base_path: pathlib.Path = DOWNLOAD_ROOT,
+                      root_id: Optional[str] = None,
+                      state_file: pathlib.Path = DELTA_STATE_FILE,
+                      etags_file: pathlib.Path = ETAGS_FILE) -> None:
+    """
+    Traverse folders, then download files concurrently, preserving structure.
+    When root_id (the synced folder's item id) is given, a saved delta link is
+    used to fetch only items changed since the previous run.
+    """
+    files: Optional[List[Tuple[Dict[str, Any], pathlib.Path]]] = None
+    folders: Dict[str, str] = {}
+    delta_link: Optional[str] = None
+    state = load_delta_state(state_file) if root_id else {}
+
+    if state.get("deltaLink") and state.get("rootId") == root_id:
+        folders = state.get("folders", {})
+        try:
+            items, delta_link = delta_children(token, drive_id, state["deltaLink"])
+            files = resolve_delta_files(items, folders, base_path)
+            if files is not None:
+                log(f"[Delta] {len(items)} change(s) since last sync")
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 410:
+                raise
+            log("[Delta] Saved delta link expired — full resync")
+
+    if files is None:
+        # Take the delta starting point before walking so no change is missed
+        if root_id:
+            _, delta_link = delta_children(token, drive_id)
+        folders = {root_id: ""} if root_id else {}
+        files = collect_files(token, drive_id, folder_path, base_path, folders)
+
+    etags = load_etags(etags_file)
+    log(f"[Run] {len(files)} file(s) to check/download with {MAX_WORKERS} worker(s)")
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [executor.submit(download_item, token, drive_id, it, base, etags) for it, base in files]
+            for future in as_completed(futures):
+                future.result()  # re-raise download errors
+    finally:
+        # Keep eTags of whatever did get downloaded, even if a download failed
+        save_etags(etags_file, etags)
+
+    # Only advance the delta link once everything was downloaded
+    if root_id and delta_link:
+        save_delta_state(state_file, {"rootId": root_id, "deltaLink": delta_link, "folders": folders})
 
 def main() -> None:
     token   = get_token()
@@ -206,7 +431,7 @@ def main() -> None:
     base.mkdir(parents=True, exist_ok=True)
 
     log(f"[Run] Downloading '{START_PATH or '/'}' to '{base}' (chunk={CHUNK_SIZE//(1024*1024)}MB)...")
-    walk_and_download(token, drive_id, START_PATH, base)
+    walk_and_download(token, drive_id, START_PATH, base, root_id=item["id"])
     log(f"[OK] Download complete: '{START_PATH or '/'}' -> '{base}'")
     log(f"[INFO] SVN target URL (for workflow step): {SVN_URL}")
 
@@ -1,17 +1,29 @@
 import os
 import sys
+import errno
 import shutil
 import tempfile
 import subprocess
+import xml.etree.ElementTree as ET
 from pathlib import Path
 
+# Max paths per batched svn command (keeps the command line well under ARG_MAX)
+SVN_BATCH_SIZE = 500
+
 def run(cmd, cwd=None, check=True):
-    """Run a command and return (returncode, stdout, stderr)."""
-    print(f"==> RUN: {cmd} (cwd={cwd})")
+    """
+    Run a command and return (returncode, stdout, stderr).
+    A string runs through the shell; a list is passed as argv without one.
+    """
+    shell = isinstance(cmd, str)
+    if not shell:
+        cmd = [str(arg) for arg in cmd]
+    printable = cmd if shell else subprocess.list2cmdline(cmd)
+    print(f"==> RUN: {printable} (cwd={cwd})")
     proc = subprocess.run(
         cmd,
         cwd=cwd,
-        shell=True,
+        shell=shell,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         text=True
@@ -20,7 +32,7 @@ def run(cmd, cwd=None, check=True):
     if proc.stderr.strip():
         print(proc.stderr, file=sys.stderr)
     if check and proc.returncode != 0:
-        raise RuntimeError(f"Command failed ({proc.returncode}): {cmd}\n{proc.stderr}")
+        raise RuntimeError(f"Command failed ({proc.returncode}): {printable}\n{proc.stderr}")
     return proc.returncode, proc.stdout, proc.stderr
 
 def validate_env():
@@ -42,6 +54,37 @@ def svn_checkout(url, username, password, dest):
     )
     run(cmd)
 
+# copy_file_range errors that just mean "not supported here" -> use shutil
+_COPY_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+def fast_copy(src, dst):
+    """
+    Copy file data with os.copy_file_range (in-kernel, reflink on CoW
+    filesystems), falling back to shutil.copyfile; then copy metadata like copy2.
+    """
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    except AttributeError:
+        # os.copy_file_range is Linux-only
+        shutil.copyfile(src, dst)
+    except OSError as e:
+        if e.errno not in _COPY_FALLBACK_ERRNOS:
+            raise
+        shutil.copyfile(src, dst)
+    else:
+        if remaining > 0:
+            # copy_file_range stopped short (EOF moved, or a filesystem that
+            # reports 0); don't leave dst truncated
+            shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+    return dst
+
 def copy_source_to_wc(source_dir: Path, wc_dir: Path):
     """
     Copy all files/directories from source_dir into wc_dir.
@@ -55,8 +98,11 @@ def copy_source_to_wc(source_dir: Path, wc_dir: Path):
     wc_dir.mkdir(parents=True, exist_ok=True)
 
     # Copy each top-level entry from source into wc_dir
-    for entry in source_dir.iterdir():
-        src = entry
+    # (scandir reuses the directory listing's file type, no extra stat per entry)
+    with os.scandir(source_dir) as entries:
+        top_level = list(entries)
+    for entry in top_level:
+        src = Path(entry.path)
         dst = wc_dir / entry.name
         if entry.is_dir():
             # Copy directory tree; merge into existing dir
@@ -73,11 +119,12 @@ def copy_source_to_wc(source_dir: Path, wc_dir: Path):
                             continue
                         s = Path(root) / f
                         t = target_root / f
-                        shutil.copy2(s, t)
+                        fast_copy(s, t)
             else:
-                shutil.copytree(src, dst, ignore=ignore_svn, dirs_exist_ok=True)
+                shutil.copytree(src, dst, ignore=ignore_svn, dirs_exist_ok=True,
+                                copy_function=fast_copy)
         else:
-            shutil.copy2(src, dst)
+            fast_copy(src, dst)
 
 def svn_stage_changes(wc_dir: Path):
     """
@@ -88,28 +135,25 @@ def svn_stage_changes(wc_dir: Path):
     # Add any new/modified files
     run('svn add --force --parents .', cwd=str(wc_dir))
 
-    # Detect missing versioned files and delete them from SVN
-    # 'svn status' outputs lines starting with:
-    #   !  item is missing (removed from working copy)
-    #   D  scheduled for deletion
-    #   ?  unversioned
-    # We'll delete the '!' and keep 'D' as is.
-    rc, out, _ = run('svn status', cwd=str(wc_dir), check=False)
+    # Detect missing versioned files and delete them from SVN.
+    # 'svn status --xml' reports each entry's state in <wc-status item="...">:
+    #   missing      item is missing (removed from working copy)
+    #   deleted      scheduled for deletion
+    #   unversioned  not under version control
+    # We'll delete the 'missing' ones and keep 'deleted' as is.
+    rc, out, _ = run('svn status --xml', cwd=str(wc_dir), check=False)
     missing_paths = []
-    for line in out.splitlines():
-        line = line.rstrip()
-        if not line:
-            continue
-        flag = line[0]
-        # path is last token; status format is "FLAG ...... PATH"
-        path = line[1:].strip()
-        if flag == '!':
-            missing_paths.append(path)
-
-    # Delete missing files from SVN (if any)
-    for p in missing_paths:
-        # Use --force to remove directories
-        run(f'svn delete --force "{p}"', cwd=str(wc_dir))
+    if rc == 0 and out.strip():
+        for entry in ET.fromstring(out).iter('entry'):
+            wc_status = entry.find('wc-status')
+            if wc_status is not None and wc_status.get('item') == 'missing':
+                missing_paths.append(entry.get('path'))
+
+    # Delete missing files from SVN in batches (one svn process per batch)
+    for start in range(0, len(missing_paths), SVN_BATCH_SIZE):
+        batch = missing_paths[start:start + SVN_BATCH_SIZE]
+        # Use --force to remove directories; argv list, so no shell quoting
+        run(['svn', 'delete', '--force', '--', *batch], cwd=str(wc_dir))
 
 def svn_commit(wc_dir: Path, msg: str, username: str, password: str):
     cmd = (
@@ -0,0 +1,101 @@
+import difflib
+import random
+
+import pytest
+
+from scripts.arxml_excel import MyersCostExceeded, diff_opcodes, myers_opcodes
+
+
+def apply_opcodes(a, b, opcodes):
+    """Rebuild b from a using the opcodes, checking they tile both inputs."""
+    out = []
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            out.extend(a[i1:i2])
+        else:
+            out.extend(b[j1:j2])
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    return out
+
+
+def edit_distance(opcodes):
+    return sum((i2 - i1) + (j2 - j1) for tag, i1, i2, j1, j2 in opcodes if tag != "equal")
+
+
+def lcs_len(a, b):
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        cur = [0]
+        for j, y in enumerate(b):
+            cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+        prev = cur
+    return prev[-1]
+
+
+def random_lines(rng, alphabet="abc"):
+    return [rng.choice(alphabet) for _ in range(rng.randint(0, 15))]
+
+
+def test_myers_opcodes_random_inputs():
+    rng = random.Random(0)
+    for _ in range(2000):
+        a, b = random_lines(rng), random_lines(rng)
+        ops = myers_opcodes(a, b)
+        assert apply_opcodes(a, b, ops) == b
+        # Myers is minimal: never worse than difflib, and exactly the LCS bound
+        assert edit_distance(ops) == len(a) + len(b) - 2 * lcs_len(a, b)
+        assert edit_distance(ops) <= edit_distance(difflib.SequenceMatcher(None, a, b).get_opcodes())
+
+
+@pytest.mark.parametrize("algorithm", ["myers", "difflib"])
+def test_diff_opcodes_random_inputs(algorithm):
+    rng = random.Random(1)
+    for _ in range(1000):
+        a, b = random_lines(rng, "ab"), random_lines(rng, "ab")
+        assert apply_opcodes(a, b, diff_opcodes(a, b, algorithm)) == b
+
+
+def test_diff_opcodes_matches_difflib_on_identical_and_empty():
+    a = [f"<LINE-{i}/>" for i in range(50)]
+    assert diff_opcodes(a, list(a)) == difflib.SequenceMatcher(None, a, a).get_opcodes()
+    assert diff_opcodes([], []) == []
+    assert diff_opcodes(a, []) == [("delete", 0, 50, 0, 0)]
+    assert diff_opcodes([], a) == [("insert", 0, 0, 0, 50)]
+
+
+def test_myers_cost_cap_falls_back_to_difflib():
+    rng = random.Random(2)
+    a = [f"a{i}" for i in range(3000)]
+    b = [line if rng.random() < 1 / 3 else f"b{i}" for i, line in enumerate(a)]
+
+    with pytest.raises(MyersCostExceeded):
+        myers_opcodes(a, b, max_cost=1000)
+
+    assert apply_opcodes(a, b, diff_opcodes(a, b)) == b
+
+
+def test_small_change_on_large_input_stays_on_myers(monkeypatch):
+    # ~1% of 60k lines changed: more steps than a fixed 500k budget would
+    # allow, but well within the per-line budget
+    rng = random.Random(3)
+    a = [f"<LINE-{i}>{i}</LINE-{i}>" for i in range(60_000)]
+    b = list(a)
+    for i in rng.sample(range(len(a)), 600):
+        b[i] += " changed"
+
+    def no_difflib(*args, **kwargs):
+        raise AssertionError("fell back to difflib")
+
+    monkeypatch.setattr(difflib, "SequenceMatcher", no_difflib)
+    ops = diff_opcodes(a, b)
+    assert apply_opcodes(a, b, ops) == b
+    assert edit_distance(ops) == 1200
+
+
+def test_diff_opcodes_rejects_unknown_algorithm():
+    with pytest.raises(ValueError):
+        diff_opcodes(["a"], ["b"], "patience")
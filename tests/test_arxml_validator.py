@@ -0,0 +1,80 @@
+import json
+
+import pytest
+from lxml import etree
+
+from scripts.arxml_validator import normalize_xpath
+
+AUTOSAR_NS = "http://autosar.org/schema/r4.0"
+
+
+@pytest.mark.parametrize("xpath, expected", [
+    ("//A/B", "//*[local-name()='A']/*[local-name()='B']"),
+    ("//A[text()=$t]", "//*[local-name()='A'][text()=$t]"),
+    ("//A[@x='a/b' and B > 1]", "//*[local-name()='A'][@x='a/b' and *[local-name()='B'] > 1]"),
+    ("//A[count(B) div 2 = 1]", "//*[local-name()='A'][count(*[local-name()='B']) div 2 = 1]"),
+    ("//A/child::B/..", "//*[local-name()='A']/child::*[local-name()='B']/.."),
+    ("//*[local-name()='A']", "//*[local-name()='A']"),
+])
+def test_normalize_xpath_rewrites_only_name_tests(xpath, expected):
+    assert normalize_xpath(xpath) == expected
+    etree.XPath(normalize_xpath(xpath))  # must still compile
+
+
+def test_normalize_xpath_supports_variables():
+    root = etree.fromstring(
+        f'<AUTOSAR xmlns="{AUTOSAR_NS}"><T>5000</T><T>1</T></AUTOSAR>'
+    )
+    expr = etree.XPath(normalize_xpath("//T[text()=$t]"))
+    assert [e.text for e in expr(root, t="5000")] == ["5000"]
+
+
+@pytest.fixture
+def validator(tmp_path, monkeypatch):
+    """The validator module with `rules` loaded into its worker state."""
+    from scripts import arxml_validator
+
+    def load(rules):
+        rule_file = tmp_path / "rules.json"
+        rule_file.write_text(json.dumps({"rules": rules}), encoding="utf-8")
+        monkeypatch.setattr(arxml_validator, "RULE_FILE", str(rule_file))
+        monkeypatch.setattr(arxml_validator, "ARXML_DIR", str(tmp_path))
+        arxml_validator.init_worker(arxml_validator.load_rules())
+        return arxml_validator
+
+    return load
+
+
+def statuses(rows):
+    return [(row[2], row[6], row[7]) for row in rows]
+
+
+@pytest.mark.parametrize("rules", [
+    [{"rule_id": "R1", "xpath": "//EM-STARTUP-TIMEOUT", "condition": "EQUALS", "expected": "5000"}],
+    # non-streamable rule set: evaluated through compiled XPath on the full tree
+    [{"rule_id": "R1", "xpath": "//EM-STARTUP-TIMEOUT", "condition": "EQUALS", "expected": "5000"},
+     {"rule_id": "R2", "xpath": "//X[@y]", "condition": "EXISTS", "mandatory": False}],
+])
+def test_prefixed_root_matches_by_local_name(validator, tmp_path, rules):
+    arxml = tmp_path / "pref.arxml"
+    arxml.write_text(
+        f'<ar:AUTOSAR xmlns:ar="{AUTOSAR_NS}"><ar:EM-STARTUP-TIMEOUT>5000</ar:EM-STARTUP-TIMEOUT></ar:AUTOSAR>',
+        encoding="utf-8",
+    )
+    rows = validator(rules).process_file(str(arxml))
+    assert statuses(rows)[0] == ("R1", "5000", "PASS")
+
+
+def test_streaming_keeps_document_order_for_nested_tags(validator, tmp_path):
+    arxml = tmp_path / "nested.arxml"
+    arxml.write_text(
+        f'<AUTOSAR xmlns="{AUTOSAR_NS}"><SUB>outer<SUB>inner</SUB></SUB><SUB>last</SUB></AUTOSAR>',
+        encoding="utf-8",
+    )
+    streamed = validator([{"rule_id": "S", "xpath": "//SUB", "condition": "EXISTS"}]).process_file(str(arxml))
+    # Adding a non-streamable rule forces the compiled-XPath path on the full tree
+    parsed = validator([{"rule_id": "S", "xpath": "//SUB", "condition": "EXISTS"},
+                        {"rule_id": "X", "xpath": "//X[@y]", "condition": "EXISTS"}]).process_file(str(arxml))
+
+    assert [row[6] for row in streamed] == ["outer", "inner", "last"]
+    assert [row[6] for row in parsed if row[2] == "S"] == ["outer", "inner", "last"]
@@ -0,0 +1,165 @@
+import hashlib
+import importlib
+import json
+
+import pytest
+
+pytest.importorskip("msal")
+requests = pytest.importorskip("requests")
+
+
+def file_item(item_id, name, data, etag, parent="root"):
+    return {"id": item_id, "name": name, "file": {"mimeType": "text/plain"},
+            "size": len(data), "eTag": etag, "parentReference": {"id": parent}}
+
+
+def folder_item(item_id, name, parent="root"):
+    return {"id": item_id, "name": name, "folder": {"childCount": 1},
+            "parentReference": {"id": parent}}
+
+
+class FakeDrive:
+    """In-memory stand-in for the Graph calls made by walk_and_download."""
+
+    def __init__(self):
+        self.content = {"f1": b"alpha", "f2": b"bravo"}
+        self.tree = {
+            "Root": [file_item("f1", "a.txt", b"alpha", "e1"), folder_item("d1", "Sub")],
+            "Root/Sub": [file_item("f2", "b.txt", b"bravo", "e2", parent="d1")],
+        }
+        self.changes = []
+        self.expired = False
+        self.walks = 0
+        self.downloads = []
+
+    def edit(self, item_id, data, etag):
+        self.content[item_id] = data
+        for children in self.tree.values():
+            for it in children:
+                if it["id"] == item_id:
+                    it.update(size=len(data), eTag=etag)
+                    return dict(it)
+
+    def list_children(self, token, drive_id, rel_path=None):
+        self.walks += 1
+        return [dict(it) for it in self.tree.get(rel_path or "", [])]
+
+    def delta_children(self, token, drive_id, token_state=None):
+        if token_state is None:
+            return [], "delta-latest"
+        if self.expired:
+            resp = requests.Response()
+            resp.status_code = 410
+            raise requests.HTTPError(response=resp)
+        return self.changes, "delta-next"
+
+    def graph_stream_to_file(self, url, token, dest_path):
+        item_id = url.split("/items/")[1].split("/")[0]
+        self.downloads.append(item_id)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        dest_path.write_bytes(self.content[item_id])
+        return hashlib.sha256(self.content[item_id]).hexdigest()
+
+
+@pytest.fixture
+def sync(tmp_path, monkeypatch):
+    for var in ("GRAPH_TENANT_ID", "GRAPH_CLIENT_ID", "GRAPH_CLIENT_SECRET"):
+        monkeypatch.setenv(var, "test")
+    module = importlib.import_module("scripts.sharepoint_svn_sync")
+    drive = FakeDrive()
+    for name in ("list_children", "delta_children", "graph_stream_to_file"):
+        monkeypatch.setattr(module, name, getattr(drive, name))
+
+    base = tmp_path / "sharepoint_sync" / "Root"
+    state_file = tmp_path / "state" / "delta_state.json"
+    etags_file = tmp_path / "state" / "etags.json"
+
+    def run():
+        drive.walks = 0
+        drive.downloads.clear()
+        module.walk_and_download("token", "drive", "Root", base, root_id="root",
+                                 state_file=state_file, etags_file=etags_file)
+        return sorted(drive.downloads)
+
+    run.drive, run.base = drive, base
+    run.state_file, run.etags_file = state_file, etags_file
+    run.module = module
+    return run
+
+
+def test_first_run_walks_and_seeds_sidecar(sync):
+    assert sync() == ["f1", "f2"]
+    assert sync.drive.walks > 0
+    assert (sync.base / "Sub" / "b.txt").read_bytes() == b"bravo"
+
+    state = json.loads(sync.state_file.read_text(encoding="utf-8"))
+    assert state["deltaLink"] == "delta-latest"
+    assert state["folders"] == {"root": "", "d1": "Sub"}
+    etags = json.loads(sync.etags_file.read_text(encoding="utf-8"))
+    assert etags["f1"] == {"eTag": "e1", "sha256": hashlib.sha256(b"alpha").hexdigest()}
+
+
+def test_delta_run_downloads_only_changed_item(sync):
+    sync()
+    sync.drive.changes = [sync.drive.edit("f2", b"bravo two", "e2b")]
+    assert sync() == ["f2"]
+    assert sync.drive.walks == 0
+    assert (sync.base / "Sub" / "b.txt").read_bytes() == b"bravo two"
+    assert json.loads(sync.state_file.read_text(encoding="utf-8"))["deltaLink"] == "delta-next"
+
+
+def test_new_folder_forces_full_walk(sync):
+    sync()
+    sync.drive.content["f3"] = b"charlie"
+    sync.drive.tree["Root"].append(folder_item("d2", "New"))
+    sync.drive.tree["Root/New"] = [file_item("f3", "c.txt", b"charlie", "e3", parent="d2")]
+    sync.drive.changes = [folder_item("d2", "New")]
+    assert sync() == ["f3"]
+    assert sync.drive.walks > 0
+
+
+def test_moved_folder_forces_full_walk(sync):
+    sync()
+    sync.drive.tree["Root"][1]["name"] = "Renamed"
+    sync.drive.tree["Root/Renamed"] = sync.drive.tree.pop("Root/Sub")
+    sync.drive.changes = [folder_item("d1", "Renamed")]
+    assert sync() == ["f2"]
+    assert (sync.base / "Renamed" / "b.txt").read_bytes() == b"bravo"
+    assert json.loads(sync.state_file.read_text(encoding="utf-8"))["folders"]["d1"] == "Renamed"
+
+
+def test_expired_delta_link_forces_full_resync(sync):
+    sync()
+    sync.drive.expired = True
+    sync.drive.edit("f1", b"alpha two", "e1b")
+    assert sync() == ["f1"]
+    assert sync.drive.walks > 0
+    assert json.loads(sync.state_file.read_text(encoding="utf-8"))["deltaLink"] == "delta-latest"
+
+
+def test_same_size_file_without_recorded_etag_is_downloaded(sync):
+    sync.base.mkdir(parents=True)
+    (sync.base / "a.txt").write_bytes(b"ALPHA")
+    assert "f1" in sync()
+    assert (sync.base / "a.txt").read_bytes() == b"alpha"
+
+
+def test_locally_modified_file_is_downloaded(sync):
+    sync()
+    (sync.base / "a.txt").write_bytes(b"alphA")
+    sync.state_file.unlink()  # full walk: every file gets checked
+    assert sync() == ["f1"]
+    assert (sync.base / "a.txt").read_bytes() == b"alpha"
+
+
+def test_resolve_delta_files_keeps_last_occurrence(sync, tmp_path):
+    folders = {"root": "", "d1": "Sub"}
+    items = [
+        file_item("f1", "a.txt", b"old", "e1"),
+        folder_item("d1", "Sub"),
+        file_item("f1", "a.txt", b"newer", "e1b"),
+        {"id": "d1", "deleted": {"state": "deleted"}},
+    ]
+    files = sync.module.resolve_delta_files(items, folders, tmp_path)
+    assert [(it["id"], it["eTag"]) for it, _ in files] == [("f1", "e1b")]
+    assert folders == {"root": ""}